@@ -0,0 +1,13 @@
+"""直流负荷电流统计内核 - 使用Numba编译为机器码，仅在负荷数量较多时使用"""
+import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def column_sums(loads):
+    """按列累加 (N, 7) 负荷电流矩阵，得到 I0~I5、IR"""
+    n_loads, n_cols = loads.shape
+    stats = np.zeros(n_cols)
+    for i in range(n_loads):
+        for j in range(n_cols):
+            stats[j] += loads[i, j]
+    return stats
@@ -1,13 +1,8 @@
 import streamlit as st
 import math
 import os
-import shutil
-import openpyxl
-from openpyxl.styles import Alignment, Font, Protection
-from openpyxl.utils import get_column_letter
-import pandas as pd
 import io
-import base64
+import numpy as np
 from datetime import datetime
 
 # 设置页面配置
@@ -18,98 +13,122 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Kc值表 - 只使用1.85V放电终止电压（仅定义容量计算用到的取值）
+# 其余取值备查：89min 0.432、179min 0.263、3.0h 0.262、5.0h 0.18、
+#               6.0h 0.157、7.0h 0.14、479min 0.123、8.0h 0.123
+KC_5S = 1.34
+KC_1MIN = 1.24
+KC_29MIN = 0.8
+KC_0_5H = 0.78
+KC_59MIN = 0.558
+KC_1_0H = 0.54
+KC_1_5H = 0.428
+KC_119MIN = 0.347
+KC_2_0H = 0.344
+KC_4_0H = 0.214
+
+# 容量计算中用到的Kc倒数，以乘法代替除法
+INV_KC_5S = 1.0 / KC_5S
+INV_KC_1MIN = 1.0 / KC_1MIN
+INV_KC_29MIN = 1.0 / KC_29MIN
+INV_KC_59MIN = 1.0 / KC_59MIN
+INV_KC_0_5H = 1.0 / KC_0_5H
+INV_KC_119MIN = 1.0 / KC_119MIN
+INV_KC_1_5H = 1.0 / KC_1_5H
+INV_KC_1_0H = 1.0 / KC_1_0H
+INV_KC_2_0H = 1.0 / KC_2_0H
+INV_KC_4_0H = 1.0 / KC_4_0H
+
+# 向上取整前扣除的容差
+CEIL_EPS = 1e-9
+
+def _ceil_tol(x, eps=CEIL_EPS):
+    """带容差的向上取整，避免浮点误差使恰好为整数的结果多进一位"""
+    return math.ceil(x - eps)
+
 class DCLoadCalculator:
-    def __init__(self):
-        # 初始化Kc值表 - 只使用1.85V放电终止电压
-        self.kc_values_185 = {
-            '5s': 1.34,
-            '1min': 1.24,
-            '29min': 0.8,
-            '0.5h': 0.78,
-            '59min': 0.558,
-            '1.0h': 0.54,
-            '89min': 0.432,
-            '1.5h': 0.428,
-            '119min': 0.347,
-            '2.0h': 0.344,
-            '179min': 0.263,
-            '3.0h': 0.262,
-            '4.0h': 0.214,
-            '5.0h': 0.18,
-            '6.0h': 0.157,
-            '7.0h': 0.14,
-            '479min': 0.123,
-            '8.0h': 0.123
-        }
-        
-        self.loads_data = []
+    # 负荷矩阵的列顺序，与统计结果 I0~I5、IR 一一对应
+    LOAD_CURRENT_KEYS = ('frequent_current', 'cho_current', 'stage1_current', 'stage2_current',
+                         'stage3_current', 'stage4_current', 'random_current')
+    STAT_KEYS = ('I0', 'I1', 'I2', 'I3', 'I4', 'I5', 'IR')
+    CAPACITY_KEYS = ('initial', 'stage1', 'stage2', 'stage3', 'stage4', 'random')
+    COMBINED_KEYS = ('initial', 'stage1', 'stage2', 'stage3', 'stage4')
+    # 电流换算系数：1000 / 220
+    _I_FACTOR = 1000.0 / 220.0
+    # 负荷数量达到该值时改用numba编译的求和内核（dc_math）；
+    # 常规规模下直接用NumPy求和，避免导入numba及首次编译的开销
+    JIT_MIN_LOADS = 1000
 
-    def calculate_current(self, capacity, load_factor):
+    @staticmethod
+    def calculate_current(capacity, load_factor):
         """计算电流：容量(kW) * 1000 * 负荷系数 / 220"""
-        return capacity * 1000 * load_factor / 220
+        return capacity * load_factor * DCLoadCalculator._I_FACTOR
 
-    def calculate_statistics(self):
-        """计算电流统计 - 严格按照表格中的公式"""
-        stats = {
-            'I0': sum(load['frequent_current'] for load in self.loads_data),
-            'I1': sum(load['cho_current'] for load in self.loads_data),
-            'I2': sum(load['stage1_current'] for load in self.loads_data),
-            'I3': sum(load['stage2_current'] for load in self.loads_data),
-            'I4': sum(load['stage3_current'] for load in self.loads_data),
-            'I5': sum(load['stage4_current'] for load in self.loads_data),
-            'IR': sum(load['random_current'] for load in self.loads_data)
-        }
-        return stats
+    def loads_to_matrix(self, loads):
+        """将负荷列表转换为 (N, 7) 的电流矩阵，列顺序见 LOAD_CURRENT_KEYS"""
+        rows = [[load[key] for key in self.LOAD_CURRENT_KEYS] for load in loads]
+        return np.array(rows, dtype=np.float64).reshape(-1, len(self.LOAD_CURRENT_KEYS))
+
+    @staticmethod
+    def to_dict(keys, values):
+        """将计算结果数组转换为按名称索引的字典，供界面显示"""
+        return dict(zip(keys, values.tolist()))
+
+    def calculate_statistics(self, loads_matrix):
+        """计算电流统计 - 返回按 STAT_KEYS 排列的 I0~I5、IR"""
+        if len(loads_matrix) >= self.JIT_MIN_LOADS:
+            try:
+                from dc_math import column_sums
+            except ImportError:
+                # 未安装numba时仍使用NumPy求和
+                pass
+            else:
+                return column_sums(loads_matrix)
+        return loads_matrix.sum(axis=0)
 
     def calculate_capacity(self, stats):
-        """计算容量 - 严格按照表格中的公式和取值"""
-        kc = self.kc_values_185
-        
-        capacity_calc = {}
-        
-        # 初期（1min）容量计算
-        capacity_calc['initial'] = 1.4 * (stats['I1'] / kc['1min'])
-        
-        # 持续0.5h容量计算
-        capacity_calc['stage1'] = 1.4 * ((stats['I1'] / kc['2.0h']) + 
-                                        ((stats['I2'] - stats['I1']) / kc['29min']))
-        
-        # 持续1h容量计算
-        capacity_calc['stage2'] = 1.4 * ((stats['I1'] / kc['2.0h']) + 
-                                        ((stats['I2'] - stats['I1']) / kc['59min']) + 
-                                        ((stats['I3'] - stats['I2']) / kc['0.5h']))
+        """
+        计算容量 - 严格按照表格中的公式和取值
+        返回 (各阶段容量数组, 随机负荷容量)，阶段顺序见 COMBINED_KEYS
+        """
+        i0, i1, i2, i3, i4, i5, ir = stats.tolist()
+        d21 = i2 - i1
+        d32 = i3 - i2
+        d43 = i4 - i3
+        d54 = i5 - i4
         
-        # 持续2h容量计算
-        capacity_calc['stage3'] = 1.4 * ((stats['I1'] / kc['2.0h']) + 
-                                        ((stats['I2'] - stats['I1']) / kc['119min']) + 
-                                        ((stats['I3'] - stats['I2']) / kc['1.5h']) + 
-                                        ((stats['I4'] - stats['I3']) / kc['1.0h']))
-         
-        # 持续4h容量计算
-        capacity_calc['stage4'] = 1.4 * ((stats['I1'] / kc['4.0h']) + 
-                                        ((stats['I2'] - stats['I1']) / kc['4.0h']) + 
-                                        ((stats['I5'] - stats['I4']) / kc['2.0h']))
+        stages = 1.4 * np.array([
+            # 初期（1min）容量计算
+            i1 * INV_KC_1MIN,
+            # 持续0.5h容量计算
+            i1 * INV_KC_2_0H + d21 * INV_KC_29MIN,
+            # 持续1h容量计算
+            i1 * INV_KC_2_0H + d21 * INV_KC_59MIN + d32 * INV_KC_0_5H,
+            # 持续2h容量计算
+            i1 * INV_KC_2_0H + d21 * INV_KC_119MIN + d32 * INV_KC_1_5H + d43 * INV_KC_1_0H,
+            # 持续4h容量计算
+            i1 * INV_KC_4_0H + d21 * INV_KC_4_0H + d54 * INV_KC_2_0H
+        ])
 
         # 随机负荷容量计算
-        capacity_calc['random'] = stats['IR'] / kc['5s']
+        random_cap = ir * INV_KC_5S
         
-        return capacity_calc
-
-    def calculate_combined_load(self, capacity_calc):
-        """计算叠加随机负荷 - 严格按照表格中的公式"""
-        combined = {
-            'initial': capacity_calc['initial'] + capacity_calc['random'],
-            'stage1': capacity_calc['stage1'] + capacity_calc['random'],
-            'stage2': capacity_calc['stage2'] + capacity_calc['random'],
-            'stage3': capacity_calc['stage3'] + capacity_calc['random'],
-            'stage4': capacity_calc['stage4'] + capacity_calc['random']
-        }
-        return combined
+        return stages, random_cap
 
-    def calculate_final_capacity(self, combined_load):
-        """计算最终容量取值（向上取整）"""
-        max_capacity = max(combined_load.values())
-        return math.ceil(max_capacity)
+    def calculate_all(self, loads_matrix):
+        """一次完成电流统计、容量计算、叠加随机负荷和最终容量取值"""
+        stats = self.calculate_statistics(loads_matrix)
+        stages, random_cap = self.calculate_capacity(stats)
+        
+        # 叠加随机负荷
+        combined = stages + random_cap
+        
+        return (
+            self.to_dict(self.STAT_KEYS, stats),
+            self.to_dict(self.CAPACITY_KEYS, np.append(stages, random_cap)),
+            self.to_dict(self.COMBINED_KEYS, combined),
+            _ceil_tol(combined.max())
+        )
 
 class BatteryCountCalculator:
     """蓄电池个数计算器"""
@@ -120,7 +139,7 @@ class BatteryCountCalculator:
     def calculate_battery_count(self, un, uf):
         """计算蓄电池个数：n = (Un / Uf) * 1.05，然后向上取整"""
         n = (un / uf) * 1.05
-        return math.ceil(n)
+        return _ceil_tol(n)
     
     def calculate_with_inputs(self, un_input, uf_input):
         """根据输入计算蓄电池个数，处理输入验证"""
@@ -132,12 +151,15 @@ class BatteryCountCalculator:
                 return None, "电压值必须大于0"
             
             battery_count = self.calculate_battery_count(un, uf)
-            calculation_process = f"计算过程:\n"
-            calculation_process += f"n = (Un / Uf) × 1.05\n"
-            calculation_process += f"  = ({un} / {uf}) × 1.05\n"
-            calculation_process += f"  = {un/uf:.4f} × 1.05\n"
-            calculation_process += f"  = {(un/uf)*1.05:.4f}\n"
-            calculation_process += f"向上取整 = {battery_count}"
+            ratio = un / uf
+            calculation_process = (
+                f"计算过程:\n"
+                f"n = (Un / Uf) × 1.05\n"
+                f"  = ({un} / {uf}) × 1.05\n"
+                f"  = {ratio:.4f} × 1.05\n"
+                f"  = {ratio * 1.05:.4f}\n"
+                f"向上取整 = {battery_count}"
+            )
             
             return battery_count, calculation_process
             
@@ -163,10 +185,13 @@ class HighFrequencyPowerModuleCalculator:
         """
         try:
             # 1. 计算电流
-            calc_current = 1.25 * (battery_capacity / 10) + frequent_current
+            capacity_c10 = battery_capacity / 10
+            charge_current = 1.25 * capacity_c10
+            calc_current = charge_current + frequent_current
             
             # 2. 计算n1（基本模块数量）
-            n1 = math.ceil(calc_current / module_current)
+            module_ratio = calc_current / module_current
+            n1 = _ceil_tol(module_ratio)
             
             # 3. 计算n2（附加模块数量）
             n2 = 1 if n1 <= 6 else 2
@@ -175,21 +200,23 @@ class HighFrequencyPowerModuleCalculator:
             total_modules = n1 + n2
             
             # 生成计算过程说明
-            calculation_process = f"计算过程:\n"
-            calculation_process += f"1. 计算电流 = 1.25 × (蓄电池容量 ÷ 10) + 经常负荷电流\n"
-            calculation_process += f"   = 1.25 × ({battery_capacity} ÷ 10) + {frequent_current}\n"
-            calculation_process += f"   = 1.25 × {battery_capacity/10:.2f} + {frequent_current}\n"
-            calculation_process += f"   = {1.25*(battery_capacity/10):.2f} + {frequent_current}\n"
-            calculation_process += f"   = {calc_current:.2f} A\n\n"
-            calculation_process += f"2. n1 = 计算电流 ÷ 单个模块额定电流 (向上取整)\n"
-            calculation_process += f"   = {calc_current:.2f} ÷ {module_current}\n"
-            calculation_process += f"   = {calc_current/module_current:.2f}\n"
-            calculation_process += f"   向上取整 = {n1}\n\n"
-            calculation_process += f"3. n2 = 附加模块数量\n"
-            calculation_process += f"   n1 = {n1}, 因此n2 = {n2}\n\n"
-            calculation_process += f"4. 总模块数量 n = n1 + n2\n"
-            calculation_process += f"   = {n1} + {n2}\n"
-            calculation_process += f"   = {total_modules}"
+            calculation_process = (
+                f"计算过程:\n"
+                f"1. 计算电流 = 1.25 × (蓄电池容量 ÷ 10) + 经常负荷电流\n"
+                f"   = 1.25 × ({battery_capacity} ÷ 10) + {frequent_current}\n"
+                f"   = 1.25 × {capacity_c10:.2f} + {frequent_current}\n"
+                f"   = {charge_current:.2f} + {frequent_current}\n"
+                f"   = {calc_current:.2f} A\n\n"
+                f"2. n1 = 计算电流 ÷ 单个模块额定电流 (向上取整)\n"
+                f"   = {calc_current:.2f} ÷ {module_current}\n"
+                f"   = {module_ratio:.2f}\n"
+                f"   向上取整 = {n1}\n\n"
+                f"3. n2 = 附加模块数量\n"
+                f"   n1 = {n1}, 因此n2 = {n2}\n\n"
+                f"4. 总模块数量 n = n1 + n2\n"
+                f"   = {n1} + {n2}\n"
+                f"   = {total_modules}"
+            )
             
             return {
                 'calc_current': calc_current,
@@ -202,11 +229,78 @@ class HighFrequencyPowerModuleCalculator:
         except Exception as e:
             return None
 
-def create_download_link(file_data, file_name, link_text):
-    """创建文件下载链接"""
-    b64 = base64.b64encode(file_data).decode()
-    href = f'<a href="data:application/octet-stream;base64,{b64}" download="{file_name}">{link_text}</a>'
-    return href
+# 计算器不保存任何会话数据，在模块加载时创建一次
+_DC_CALC = DCLoadCalculator()
+_BATTERY_CALC = BatteryCountCalculator()
+_HF_CALC = HighFrequencyPowerModuleCalculator()
+
+# 示例负荷数据：(名称, 容量kW, 负荷系数, 经常, 初期, 0.5h, 1h, 2h, 4h, 随机)
+EXAMPLE_LOADS = [
+    ("控制、保护、继电器", 10, 0.6, True, True, True, True, True, False, False),
+    ("断路器跳闸", 3.6, 0.6, False, True, False, False, False, False, False),
+    ("断路器自投", 1.8, 1, False, False, False, False, False, False, True),
+    ("断路器合闸", 1.8, 1, False, False, False, False, False, False, True),
+    ("UPS电源", 15, 0.6, False, True, True, True, True, False, False),
+    ("全场事故照明负荷", 3, 1, False, True, True, True, True, False, False),
+    ("DC/DC变换装置", 3, 0.8, False, False, False, False, False, True, False),
+]
+
+# 示例负荷的计算电流在模块加载时一次算出
+_example_params = np.array([load[1:3] for load in EXAMPLE_LOADS], dtype=np.float64)
+EXAMPLE_CURRENTS = (_example_params[:, 0] * _example_params[:, 1] * DCLoadCalculator._I_FACTOR).tolist()
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _load_file_bytes(path):
+    """
+    读取本地文件内容，返回 (内容, 文件大小)；文件不存在时内容为None
+    读取出错时抛出异常，不会被缓存；内容只读，各次重跑共享同一份bytes
+    """
+    if not os.path.exists(path):
+        return None, 0
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        return f.read(), file_size
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _build_sample_excel():
+    """生成示例Excel文件内容"""
+    # 仅在需要生成示例文件时才导入openpyxl，减少应用启动时间
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    # 使用只写模式，按行批量写入
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("直流负荷统计")
+
+    # 预先创建带样式的标题和表头单元格
+    title_cell = WriteOnlyCell(ws, value="直流负荷统计表")
+    title_cell.font = Font(size=14, bold=True)
+
+    header_font = Font(bold=True)
+    headers = ["序号", "负荷名称", "容量(kW)", "负荷系数", "计算电流(A)"]
+    header_row = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        header_row.append(cell)
+
+    # 示例数据
+    example_data = [
+        ["控制、保护、继电器", 10, 0.6, 27.27],
+        ["断路器跳闸", 3.6, 0.6, 9.82],
+        ["UPS电源", 15, 0.6, 40.91],
+    ]
+
+    rows = [[title_cell], [], header_row]
+    rows.extend([i + 1, *data] for i, data in enumerate(example_data))
+    for row in rows:
+        ws.append(row)
+
+    # 保存到字节流
+    excel_buffer = io.BytesIO()
+    wb.save(excel_buffer)
+    return excel_buffer.getvalue()
 
 def get_file_downloads():
     """获取可下载的文件列表和内容"""
@@ -217,13 +311,10 @@ def get_file_downloads():
     
     # 文件1: 直流负荷统计.docx
     try:
-        if os.path.exists("直流负荷统计.docx"):
-            file_size = os.path.getsize("直流负荷统计.docx")
+        docx_content, file_size = _load_file_bytes("直流负荷统计.docx")
+        if docx_content is not None:
             if file_size > MAX_FILE_SIZE:
                 st.warning(f"直流负荷统计.docx 文件较大 ({file_size/1024/1024:.1f}MB)，下载可能需要较长时间")
-            
-            with open("直流负荷统计.docx", "rb") as f:
-                docx_content = f.read()
             docx_description = f"直流负荷统计文档，包含详细的负荷统计说明和表格 ({file_size/1024:.1f}KB)"
         else:
             # 如果文件不存在，创建一个小型示例文件
@@ -242,46 +333,14 @@ def get_file_downloads():
     
     # 文件2: 直流负荷统计.xlsx
     try:
-        if os.path.exists("直流负荷统计.xlsx"):
-            file_size = os.path.getsize("直流负荷统计.xlsx")
+        excel_content, file_size = _load_file_bytes("直流负荷统计.xlsx")
+        if excel_content is not None:
             if file_size > MAX_FILE_SIZE:
                 st.warning(f"直流负荷统计.xlsx 文件较大 ({file_size/1024/1024:.1f}MB)，下载可能需要较长时间")
-            
-            with open("直流负荷统计.xlsx", "rb") as f:
-                excel_content = f.read()
             excel_description = f"直流负荷统计Excel表格，包含负荷数据和计算公式 ({file_size/1024:.1f}KB)"
         else:
             # 如果文件不存在，创建示例Excel文件
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "直流负荷统计"
-            
-            # 添加标题
-            ws['A1'] = "直流负荷统计表"
-            ws['A1'].font = Font(size=14, bold=True)
-            
-            # 添加表头
-            headers = ["序号", "负荷名称", "容量(kW)", "负荷系数", "计算电流(A)"]
-            for i, header in enumerate(headers):
-                ws.cell(row=3, column=i+1, value=header)
-                ws.cell(row=3, column=i+1).font = Font(bold=True)
-            
-            # 添加示例数据
-            example_data = [
-                ["控制、保护、继电器", 10, 0.6, 27.27],
-                ["断路器跳闸", 3.6, 0.6, 9.82],
-                ["UPS电源", 15, 0.6, 40.91],
-            ]
-            
-            for i, data in enumerate(example_data):
-                ws.cell(row=4+i, column=1, value=i+1)
-                for j, value in enumerate(data):
-                    ws.cell(row=4+i, column=j+2, value=value)
-            
-            # 保存到字节流
-            excel_buffer = io.BytesIO()
-            wb.save(excel_buffer)
-            excel_content = excel_buffer.getvalue()
+            excel_content = _build_sample_excel()
             excel_description = "直流负荷统计Excel表格，包含负荷数据和计算公式 (示例文件)"
     except Exception as e:
         st.error(f"加载直流负荷统计.xlsx文件时出错: {str(e)}")
@@ -308,10 +367,10 @@ def get_file_downloads():
     return downloads
 
 def main():
-    # 初始化计算器
-    dc_calculator = DCLoadCalculator()
-    battery_calculator = BatteryCountCalculator()
-    hf_power_calculator = HighFrequencyPowerModuleCalculator()
+    # 使用模块级计算器实例（无可变状态，跨会话、跨重跑共享）
+    dc_calculator = _DC_CALC
+    battery_calculator = _BATTERY_CALC
+    hf_power_calculator = _HF_CALC
     
     # 页面标题
     st.title("⚡ 直流系统计算软件")
@@ -333,6 +392,8 @@ def main():
         # 初始化session state
         if 'loads_data' not in st.session_state:
             st.session_state.loads_data = []
+        if 'loads_matrix' not in st.session_state:
+            st.session_state.loads_matrix = dc_calculator.loads_to_matrix(st.session_state.loads_data)
         
         # 输入表单
         with st.form("load_input_form"):
@@ -391,24 +452,17 @@ def main():
                         'random_current': current if random else 0
                     }
                     st.session_state.loads_data.append(load_data)
+                    st.session_state.loads_matrix = np.vstack([
+                        st.session_state.loads_matrix,
+                        dc_calculator.loads_to_matrix([load_data])
+                    ])
                     st.success(f"负荷 '{name}' 添加成功!")
         
         # 示例数据按钮
         if st.button("加载示例数据"):
-            example_loads = [
-                ("控制、保护、继电器", 10, 0.6, True, True, True, True, True, False, False),
-                ("断路器跳闸", 3.6, 0.6, False, True, False, False, False, False, False),
-                ("断路器自投", 1.8, 1, False, False, False, False, False, False, True),
-                ("断路器合闸", 1.8, 1, False, False, False, False, False, False, True),
-                ("UPS电源", 15, 0.6, False, True, True, True, True, False, False),
-                ("全场事故照明负荷", 3, 1, False, True, True, True, True, False, False),
-                ("DC/DC变换装置", 3, 0.8, False, False, False, False, False, True, False),
-            ]
-            
             st.session_state.loads_data = []
-            for load in example_loads:
+            for load, current in zip(EXAMPLE_LOADS, EXAMPLE_CURRENTS):
                 name, capacity, load_factor, frequent, cho, stage1, stage2, stage3, stage4, random = load
-                current = dc_calculator.calculate_current(capacity, load_factor)
                 load_data = {
                     'name': name,
                     'capacity': capacity,
@@ -423,90 +477,84 @@ def main():
                     'random_current': current if random else 0
                 }
                 st.session_state.loads_data.append(load_data)
+            st.session_state.loads_matrix = dc_calculator.loads_to_matrix(st.session_state.loads_data)
             st.success("示例数据加载成功!")
         
         # 清空按钮
         if st.button("清空所有负荷"):
             st.session_state.loads_data = []
+            st.session_state.loads_matrix = dc_calculator.loads_to_matrix([])
             st.success("所有负荷已清空!")
         
         # 显示负荷表格
         if st.session_state.loads_data:
             st.subheader("负荷列表")
             
-            # 准备表格数据
-            table_data = []
-            for i, load in enumerate(st.session_state.loads_data):
-                row = [
-                    i + 1,
-                    load['name'],
-                    f"{load['capacity']:.2f}",
-                    f"{load['load_factor']:.2f}",
-                    f"{load['calc_current']:.2f}",
-                    "是" if load['frequent_current'] > 0 else "否",
-                    "是" if load['cho_current'] > 0 else "否",
-                    "是" if load['stage1_current'] > 0 else "否",
-                    "是" if load['stage2_current'] > 0 else "否",
-                    "是" if load['stage3_current'] > 0 else "否",
-                    "是" if load['stage4_current'] > 0 else "否",
-                    "是" if load['random_current'] > 0 else "否"
-                ]
-                table_data.append(row)
+            # 按列准备表格数据
+            loads = st.session_state.loads_data
+            
+            def stage_column(key):
+                return ["是" if load[key] > 0 else "否" for load in loads]
+            
+            table_columns = {
+                '序号': list(range(1, len(loads) + 1)),
+                '负荷名称': [load['name'] for load in loads],
+                '容量(kW)': [f"{load['capacity']:.2f}" for load in loads],
+                '负荷系数': [f"{load['load_factor']:.2f}" for load in loads],
+                '计算电流(A)': [f"{load['calc_current']:.2f}" for load in loads],
+                '经常负荷': stage_column('frequent_current'),
+                '初期': stage_column('cho_current'),
+                '0.5h': stage_column('stage1_current'),
+                '1h': stage_column('stage2_current'),
+                '2h': stage_column('stage3_current'),
+                '4h': stage_column('stage4_current'),
+                '随机': stage_column('random_current')
+            }
             
             # 显示表格
-            df = pd.DataFrame(
-                table_data,
-                columns=['序号', '负荷名称', '容量(kW)', '负荷系数', '计算电流(A)', 
-                        '经常负荷', '初期', '0.5h', '1h', '2h', '4h', '随机']
-            )
-            st.dataframe(df, use_container_width=True)
+            st.dataframe(table_columns, use_container_width=True)
             
             # 计算按钮
             if st.button("开始计算"):
-                dc_calculator.loads_data = st.session_state.loads_data
-                
                 try:
-                    # 计算统计
-                    stats = dc_calculator.calculate_statistics()
-                    
-                    # 计算容量
-                    capacity_calc = dc_calculator.calculate_capacity(stats)
-                    
-                    # 计算叠加负荷
-                    combined_load = dc_calculator.calculate_combined_load(capacity_calc)
-                    
-                    # 计算最终容量
-                    final_capacity = dc_calculator.calculate_final_capacity(combined_load)
+                    # 计算统计、容量、叠加负荷及最终容量
+                    stats, capacity_calc, combined_load, final_capacity = dc_calculator.calculate_all(st.session_state.loads_matrix)
                     
                     # 显示结果
                     col1, col2, col3 = st.columns(3)
                     
                     with col1:
                         st.subheader("电流统计 (A)")
-                        st.text(f"I0 (经常负荷):    {stats['I0']:.2f} A")
-                        st.text(f"I1 (初期 1min):   {stats['I1']:.2f} A")
-                        st.text(f"I2 (0.5h):        {stats['I2']:.2f} A")
-                        st.text(f"I3 (1h):          {stats['I3']:.2f} A")
-                        st.text(f"I4 (2h):          {stats['I4']:.2f} A")
-                        st.text(f"I5 (4h):          {stats['I5']:.2f} A")
-                        st.text(f"IR (随机 5s):     {stats['IR']:.2f} A")
+                        st.code("\n".join([
+                            f"I0 (经常负荷):    {stats['I0']:.2f} A",
+                            f"I1 (初期 1min):   {stats['I1']:.2f} A",
+                            f"I2 (0.5h):        {stats['I2']:.2f} A",
+                            f"I3 (1h):          {stats['I3']:.2f} A",
+                            f"I4 (2h):          {stats['I4']:.2f} A",
+                            f"I5 (4h):          {stats['I5']:.2f} A",
+                            f"IR (随机 5s):     {stats['IR']:.2f} A"
+                        ]), language=None)
                     
                     with col2:
                         st.subheader("容量计算 (Ah)")
-                        st.text(f"初期 (1min):      {capacity_calc['initial']:.2f} Ah")
-                        st.text(f"持续0.5h:         {capacity_calc['stage1']:.2f} Ah")
-                        st.text(f"持续1h:           {capacity_calc['stage2']:.2f} Ah")
-                        st.text(f"持续2h:           {capacity_calc['stage3']:.2f} Ah")
-                        st.text(f"持续4h:           {capacity_calc['stage4']:.2f} Ah")
-                        st.text(f"随机负荷:         {capacity_calc['random']:.2f} Ah")
+                        st.code("\n".join([
+                            f"初期 (1min):      {capacity_calc['initial']:.2f} Ah",
+                            f"持续0.5h:         {capacity_calc['stage1']:.2f} Ah",
+                            f"持续1h:           {capacity_calc['stage2']:.2f} Ah",
+                            f"持续2h:           {capacity_calc['stage3']:.2f} Ah",
+                            f"持续4h:           {capacity_calc['stage4']:.2f} Ah",
+                            f"随机负荷:         {capacity_calc['random']:.2f} Ah"
+                        ]), language=None)
                     
                     with col3:
                         st.subheader("叠加随机负荷 (Ah)")
-                        st.text(f"初期+随机:        {combined_load['initial']:.2f} Ah")
-                        st.text(f"0.5h+随机:        {combined_load['stage1']:.2f} Ah")
-                        st.text(f"1h+随机:          {combined_load['stage2']:.2f} Ah")
-                        st.text(f"2h+随机:          {combined_load['stage3']:.2f} Ah")
-                        st.text(f"4h+随机:          {combined_load['stage4']:.2f} Ah")
+                        st.code("\n".join([
+                            f"初期+随机:        {combined_load['initial']:.2f} Ah",
+                            f"0.5h+随机:        {combined_load['stage1']:.2f} Ah",
+                            f"1h+随机:          {combined_load['stage2']:.2f} Ah",
+                            f"2h+随机:          {combined_load['stage3']:.2f} Ah",
+                            f"4h+随机:          {combined_load['stage4']:.2f} Ah"
+                        ]), language=None)
                     
                     st.success(f"最终计算容量: 各设计取值不一，以上结果可供参考，最终取值以个人取值为准。")
                     
@@ -637,12 +685,13 @@ def main():
                                    unsafe_allow_html=True)
                     else:
                         # 本地文件
-                        download_link = create_download_link(
-                            file_info['content'], 
-                            file_info['name'], 
-                            "📥 下载文件"
+                        st.download_button(
+                            label="📥 下载文件",
+                            data=file_info['content'],
+                            file_name=file_info['name'],
+                            mime="application/octet-stream",
+                            key=f"dl_{i}"
                         )
-                        st.markdown(download_link, unsafe_allow_html=True)
                 
                 # 添加分隔线（除了最后一个文件）
                 if i < len(downloads) - 1: